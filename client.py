@@ -1,9 +1,16 @@
 """Client module for connecting to the server."""
 import asyncio
 from websockets.asyncio.client import connect
-import json
+import orjson
 from enum import Enum
 
+# Pre-serialized request envelopes. Only the variable part of a request is
+# serialized per call and spliced between the prefix and the closing braces.
+_CREATE_REQUEST_PREFIX = b'{"action":"create","body":{"room_name":'
+_JOIN_REQUEST_PREFIX = b'{"action":"join","body":{"room_id":'
+_MESSAGE_REQUEST_PREFIX = b'{"action":"message","body":'
+_LEAVE_REQUEST = orjson.dumps({"action": "leave", "body": {}})
+
 class LogLevel(Enum):
     """Log level enumeration."""
     NONE = 0
@@ -47,7 +54,7 @@ class ChatClient:
         welcome_message = await self.websocket.recv()
         self._log(f"Connected to server: {welcome_message}", LogLevel.DEBUG)
 
-        msg = json.loads(welcome_message)
+        msg = orjson.loads(welcome_message)
         if msg.get("status") == "connected":
             self.client_id = msg.get("client_id")
             self._log(f"Assigned client ID: {self.client_id}", LogLevel.INFO)
@@ -60,17 +67,12 @@ class ChatClient:
         Create a new chat room. 
         Return the room ID upon successful creation.
         """
-        request = {
-            "action": "create",
-            "body": {
-                "room_name": room_name
-            }
-        }
+        request = _CREATE_REQUEST_PREFIX + orjson.dumps(room_name) + b'}}'
 
         self._log(f"Sending create room request: {request}", LogLevel.DEBUG)
-        await self.websocket.send(json.dumps(request))
+        await self.websocket.send(request, text=True)
         response = await self.websocket.recv()
-        msg = json.loads(response)
+        msg = orjson.loads(response)
 
         if msg.get("status") != "success":
             raise Exception(f"Failed to create room: {msg.get('message')}")
@@ -83,48 +85,48 @@ class ChatClient:
     
     async def join_room(self, room_id):
         """Join an existing chat room."""
-        request = {
-            "action": "join",
-            "body": {
-                "room_id": room_id
-            }
-        }
+        request = _JOIN_REQUEST_PREFIX + orjson.dumps(room_id) + b'}}'
 
         self._log(f"Sending join room request: {request}", LogLevel.DEBUG)
-        await self.websocket.send(json.dumps(request))
+        await self.websocket.send(request, text=True)
         response = await self.websocket.recv()
-        msg = json.loads(response)
+        msg = orjson.loads(response)
         if msg.get("status") != "success":
             raise Exception(f"Failed to join room: {msg.get('message')}")
         
         self.roomId = room_id
         self._log(f"Join room response: {response}", LogLevel.DEBUG)
         self._log(f"Joined room: {room_id}", LogLevel.INFO)
-        return json.loads(response)
+        return msg
     
     async def leave_room(self):
         """Send leave room request (fire and forget)."""
-        request = {
-            "action": "leave",
-            "body": {}
-        }
         self._log(f"Sending leave room request", LogLevel.DEBUG)
-        await self.websocket.send(json.dumps(request))
+        await self.websocket.send(_LEAVE_REQUEST, text=True)
         self._log(f"Left room", LogLevel.INFO)
     
     async def send_message(self, message_text):
-        """Send a message to the current chat room (fire and forget)."""
-        request = {
-            "action": "message",
-            "body": message_text
-        }
+        """
+        Send a message to the current chat room (fire and forget).
+        The message is usually a string, but any JSON-serializable value
+        (e.g. a dict) is forwarded to the room as-is.
+        """
+        request = _MESSAGE_REQUEST_PREFIX + orjson.dumps(message_text) + b'}'
 
         self._log(f"Sending message: {message_text}", LogLevel.DEBUG)
-        await self.websocket.send(json.dumps(request))
+        await self.websocket.send(request, text=True)
 
     
     async def read_messages(self):       
-        """Continuously read messages from the server as an async generator. These messages are client messages who are connected to the room."""
+        """Continuously read messages from the server as an async generator, yielding each one parsed into a dict. These messages are client messages who are connected to the room."""
+        async for message in self.read_raw_messages():
+            try:
+                yield orjson.loads(message)
+            except orjson.JSONDecodeError as e:
+                self._log(f"Skipping non-JSON message: {e}", LogLevel.DEBUG)
+
+    async def read_raw_messages(self):
+        """Continuously read messages from the server as an async generator, yielding them exactly as received."""
         try:
             async for message in self.websocket:
                 self._log(f"Received message: {message}", LogLevel.DEBUG)
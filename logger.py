@@ -1,6 +1,9 @@
-
-from datetime import datetime
+import atexit
+import logging
+import queue
+import sys
 from enum import Enum
+from logging.handlers import QueueHandler, QueueListener
 
 class LogLevel(Enum):
     """Log level enumeration."""
@@ -10,10 +13,28 @@ class LogLevel(Enum):
 
 
 class Logger:
-    """Simple logger class for the server."""
+    """
+    Simple logger class for the server.
+    Messages accept printf-style arguments (``logger.debug("x=%s", x)``) which are
+    only formatted when the level is enabled. Records are handed to a queue and
+    written to stdout by a background thread, keeping I/O off the event loop.
+    """
     def __init__(self, level='DEBUG'):
         self._set_level(level)
-    
+
+        # Timestamps are rendered by the listener thread from the record's creation time
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+
+        log_queue = queue.SimpleQueue()
+        self._listener = QueueListener(log_queue, handler)
+        self._listener.start()
+        atexit.register(self._listener.stop)
+
+        # Standalone logger, not registered with (or propagated to) the logging module's root
+        self._logger = logging.Logger(__name__, logging.DEBUG)
+        self._logger.addHandler(QueueHandler(log_queue))
+
     def _set_level(self, level):
         """Set the logging level."""
         if isinstance(level, LogLevel):
@@ -28,22 +49,17 @@ class Logger:
             self.level = level_map.get(level.upper() if level else None, LogLevel.DEBUG)
         else:
             self.level = LogLevel.NONE
-    
-    def _format_message(self, level_name, message):
-        """Format log message with timestamp."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        return f"[{timestamp}] [{level_name}] {message}"
-    
-    def debug(self, message):
+
+    def debug(self, message, *args):
         """Log debug message."""
         if self.level.value >= LogLevel.DEBUG.value:
-            print(self._format_message("DEBUG", message))
-    
-    def info(self, message):
+            self._logger.debug(message, *args)
+
+    def info(self, message, *args):
         """Log info message."""
         if self.level.value >= LogLevel.INFO.value:
-            print(self._format_message("INFO", message))
-    
-    def error(self, message):
+            self._logger.info(message, *args)
+
+    def error(self, message, *args):
         """Log error message."""
-        print(self._format_message("ERROR", message))
+        self._logger.error(message, *args)
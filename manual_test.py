@@ -1,37 +1,90 @@
 from client import ChatClient
 import asyncio
-import json
 import argparse
+import os
 import sys
 
+try:
+    import uvloop
+except ImportError:
+    # uvloop is optional (and unavailable on Windows), fall back to asyncio's loop
+    uvloop = None
+
+def watch_stdin(loop, lines):
+    """
+    Feed stdin into the lines queue one line at a time, reading the raw file
+    descriptor whenever it becomes readable. An empty string marks the end of input.
+    Return a function that stops watching, or None if stdin cannot be watched
+    (e.g. a redirected regular file, or Windows' Proactor event loop).
+    """
+    stdin_fd = sys.stdin.fileno()
+    encoding = sys.stdin.encoding or "utf-8"
+    pending = bytearray()
+
+    def on_readable():
+        data = os.read(stdin_fd, 4096)
+        if not data:
+            # End of input: flush an unterminated last line, then signal EOF
+            if pending:
+                lines.put_nowait(pending.decode(encoding, errors="replace"))
+            lines.put_nowait("")
+            loop.remove_reader(stdin_fd)
+            return
+        pending.extend(data)
+        # Split ourselves, so several lines arriving in one read are all delivered
+        *complete, rest = pending.split(b"\n")
+        for line in complete:
+            lines.put_nowait(line.decode(encoding, errors="replace") + "\n")
+        pending[:] = rest
+
+    try:
+        loop.add_reader(stdin_fd, on_readable)
+    except (NotImplementedError, PermissionError):
+        return None
+    return lambda: loop.remove_reader(stdin_fd)
+
 async def handle_user_input(client):
     """Handle keyboard input from the user."""
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
+    
+    # Read stdin from the event loop whenever it becomes readable (non-blocking),
+    # falling back to a blocking readline in the default executor when it cannot be watched
+    lines = asyncio.Queue()
+    stop_watching = watch_stdin(loop, lines)
     
     print("SESSION ONLINE\n- Type your message and press Enter. \n- Type 'quit' to exit and 'leave' to leave the room.")
     print(f"----------------------------------")
-    while True:
-        # Read input asynchronously (non-blocking)
-        line = await loop.run_in_executor(None, sys.stdin.readline)
-        line = line.strip()
-        
-        if not line:
-            continue
-        
-        if line.lower() == 'quit':
-            print("Exiting chat...")
-            break
-        elif line.lower() == 'leave':
-            await client.leave_room()
-        else:
-            await client.send_message(line)
-            print(f"< You: {line}")
+    try:
+        while True:
+            if stop_watching is not None:
+                line = await lines.get()
+            else:
+                line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                # End of input, nothing more can be read
+                print("Exiting chat...")
+                break
+            line = line.strip()
+            
+            if not line:
+                continue
+            
+            if line.lower() == 'quit':
+                print("Exiting chat...")
+                break
+            elif line.lower() == 'leave':
+                await client.leave_room()
+            else:
+                await client.send_message(line)
+                print(f"< You: {line}")
+    finally:
+        if stop_watching is not None:
+            stop_watching()
 
 async def handle_incoming_messages(client):
     """Handle incoming messages from the server."""
     try:
         async for msg in client.read_messages():
-            msg = json.loads(msg)
             if msg.get("body"):
                 # For client messages which contain 'body'
                 print(f"> {msg.get('from', 'server')}: {msg.get('body')}")
@@ -73,4 +126,7 @@ if __name__ == "__main__":
         for task in pending:
             task.cancel()
         
-    asyncio.run(test_client())
+    if uvloop is not None:
+        uvloop.run(test_client())
+    else:
+        asyncio.run(test_client())
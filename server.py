@@ -1,13 +1,34 @@
 import asyncio
-import json
-import uuid
+import secrets
+import orjson
 from datetime import datetime
-from websockets.asyncio.server import serve
-from logger import Logger
+from websockets.asyncio.server import broadcast, serve
+from logger import Logger, LogLevel
+
+try:
+    import uvloop
+except ImportError:
+    # uvloop is optional (and unavailable on Windows), fall back to asyncio's loop
+    uvloop = None
 
 # Initialize logger (can be changed to 'INFO' or 'NONE')
 logger = Logger('INFO')
 
+# Capacity limits, bounding the server's memory use
+MAX_CLIENTS = 10000
+MAX_ROOMS = 1000
+# Number of incoming messages buffered per connection before reading pauses
+MAX_INCOMING_QUEUE = 32
+# Bytes of unsent broadcasts a connection may accumulate before it is
+# considered a slow consumer and disconnected
+MAX_WRITE_BUFFER_SIZE = 1024 * 1024
+
+# References to fire-and-forget tasks, so they are not garbage collected early
+background_tasks = set()
+
+# IDs of slow clients whose connection is being closed
+disconnecting_clients = set()
+
 # In-memory storage for connected clients and chat rooms
 # clients stores websocket connections of each client, it follows the structure: 
 # {client_id: websocket_connection}
@@ -17,6 +38,7 @@ clients = {}
 # {
 #   room_id: {
 #       "clients": set([client_id1, client_id2, ...]), 
+#       "ws_list": [(client_id1, websocket_connection1), ...],  # cached for broadcasting
 #       "metadata": {
 #           "name": "Room Name", 
 #           "created_at": "timestamp", 
@@ -37,11 +59,38 @@ client_rooms = {}
 # Each message from a client should include the follows the format:
 # {"client_id": "string", "action": "create/join/leave/message", "body": "string or room_id"}
 
+def _refresh_ws_list(room_id):
+    """Rebuild a room's cached (client_id, websocket) list after its members change."""
+    room = rooms[room_id]
+    room["ws_list"] = [(cid, clients[cid]) for cid in room["clients"]]
+
+def _remove_from_room(client_id, room_id):
+    """Remove a client from a room's members, deleting the room once it is empty."""
+    room = rooms[room_id]
+    room["clients"].discard(client_id)
+    # Clean up empty rooms
+    if not room["clients"]:
+        del rooms[room_id]
+        logger.info(f"Room '{room['metadata']['name']}' ({room_id}) deleted (empty)")
+    else:
+        _refresh_ws_list(room_id)
+
 def create_room(client_id, room_name):
     """Create a new room and add the creator to it."""
-    room_id = str(uuid.uuid4())[:8]  # Short unique ID
+    if len(rooms) >= MAX_ROOMS:
+        logger.info(f"Client {client_id} cannot create a room, limit of {MAX_ROOMS} rooms reached")
+        return {"status": "error", "message": "Too many rooms, try again later"}
+    
+    # Move out of the current room if in one, so it is not left behind
+    old_room_id = client_rooms.get(client_id)
+    if old_room_id is not None and old_room_id in rooms:
+        logger.debug("Client %s leaving room %s before creating a new one", client_id, old_room_id)
+        _remove_from_room(client_id, old_room_id)
+    
+    room_id = secrets.token_hex(4)  # Short unique ID (8 hex chars)
     rooms[room_id] = {
         "clients": set([client_id]),
+        "ws_list": [(client_id, clients[client_id])],
         "metadata": {
             "name": room_name,
             "created_at": datetime.now().isoformat(),
@@ -50,160 +99,207 @@ def create_room(client_id, room_name):
     }
     client_rooms[client_id] = room_id
     logger.info(f"Room '{room_name}' created with ID: {room_id} by client {client_id}")
-    logger.debug(f"Room metadata: {rooms[room_id]['metadata']}")
+    logger.debug("Room metadata: %s", rooms[room_id]["metadata"])
     return {"status": "success", "room_id": room_id, "message": f"Room '{room_name}' created"}
 
 def join_room(client_id, room_id):
     """Add a client to a room."""
     if room_id not in rooms:
-        logger.debug(f"Client {client_id} tried to join non-existent room: {room_id}")
+        logger.debug("Client %s tried to join non-existent room: %s", client_id, room_id)
         return {"status": "error", "message": f"Room {room_id} does not exist"}
     
-    # Leave current room if in one
-    if client_id in client_rooms:
-        logger.debug(f"Client {client_id} leaving current room before joining new one")
-        leave_room(client_id)
+    # Move out of the current room if in one, without going through leave_room
+    old_room_id = client_rooms.get(client_id)
+    if old_room_id is not None and old_room_id != room_id and old_room_id in rooms:
+        logger.debug("Client %s leaving room %s before joining new one", client_id, old_room_id)
+        _remove_from_room(client_id, old_room_id)
     
-    rooms[room_id]["clients"].add(client_id)
-    client_rooms[client_id] = room_id
+    if old_room_id != room_id:
+        rooms[room_id]["clients"].add(client_id)
+        _refresh_ws_list(room_id)
+        client_rooms[client_id] = room_id
     room_name = rooms[room_id]["metadata"]["name"]
     logger.info(f"Client {client_id} joined room '{room_name}' ({room_id})")
-    logger.debug(f"Room {room_id} now has {len(rooms[room_id]['clients'])} clients")
+    logger.debug("Room %s now has %d clients", room_id, len(rooms[room_id]["clients"]))
     return {"status": "success", "message": f"Joined room '{room_name}'", "room_id": room_id}
 
 def leave_room(client_id):
     """Remove a client from their current room."""
     if client_id not in client_rooms:
-        logger.debug(f"Client {client_id} tried to leave but is not in any room")
+        logger.debug("Client %s tried to leave but is not in any room", client_id)
         return {"status": "error", "message": "Not in any room"}
     
     room_id = client_rooms[client_id]
     if room_id in rooms:
-        rooms[room_id]["clients"].discard(client_id)
-        # Clean up empty rooms
-        if len(rooms[room_id]["clients"]) == 0:
-            room_name = rooms[room_id]["metadata"]["name"]
-            del rooms[room_id]
-            logger.info(f"Room '{room_name}' ({room_id}) deleted (empty)")
+        _remove_from_room(client_id, room_id)
     
     del client_rooms[client_id]
     logger.info(f"Client {client_id} left room {room_id}")
     return {"status": "success", "message": "Left room"}
 
+def _disconnect_slow_client(client_id, websocket):
+    """Close the connection of a client that cannot keep up with its room's messages."""
+    if client_id in disconnecting_clients:
+        return  # Close already scheduled
+    disconnecting_clients.add(client_id)
+    logger.info(f"Client {client_id} is too slow to keep up, disconnecting")
+    task = asyncio.create_task(websocket.close(1013, "Too slow to keep up"))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
 async def broadcast_to_room(client_id, message_body):
     """Broadcast a message to all clients in the same room."""
     if client_id not in client_rooms:
-        logger.debug(f"Client {client_id} tried to send message but is not in any room")
+        logger.debug("Client %s tried to send message but is not in any room", client_id)
         return {"status": "error", "message": "You must join a room first"}
     
     room_id = client_rooms[client_id]
     if room_id not in rooms:
-        logger.debug(f"Client {client_id}'s room {room_id} no longer exists")
+        logger.debug("Client %s's room %s no longer exists", client_id, room_id)
         return {"status": "error", "message": "Room no longer exists"}
     
-
     # NOTE: Moderator module can be added here to filter or log messages
     # TODO: Implement message moderation
     # banded_words = ['shit', 'stupid', 'shutup', 'olo']  # Example banned words
     # if any(bad_word in message_body.lower() for bad_word in banded_words):
     #     logger.info(f"Message from {client_id} filtered due to inappropriate content")
-    #     logger.debug(f"Original message: {message_body[:100]}")
+    #     logger.debug("Original message: %.100s", message_body)
     #     message_body = "[Message removed due to inappropriate content]"
     # await asyncio.sleep(0.01)  # Small delay to simulate processing @ 10ms
 
-    # Get all clients in the room except the sender
-    room_clients = rooms[room_id]["clients"] - {client_id}
-    
-    # Send message to all clients in the room
-    message_data = json.dumps({
+    # The body (text or any other JSON value) is embedded as-is. Serialize once;
+    # every recipient is sent this same bytes object, so there is no per-client
+    # JSON serialization or str-to-bytes encoding
+    payload = orjson.dumps({
         "from": client_id,
         "body": message_body,
     })
 
-    logger.debug(f"Broadcasting message from {client_id} to {len(room_clients)} clients in room {room_id}")
-    logger.debug(f"Message content: {message_body[:50]}{'...' if len(message_body) > 50 else ''}")
+    # The room's connections are cached on join/leave, so only the sender has to be skipped
+    ws_list = rooms[room_id]["ws_list"]
+
+    # Guarded so the log arguments are not even computed unless DEBUG is on
+    debug = logger.level.value >= LogLevel.DEBUG.value
+    if debug:
+        logger.debug("Broadcasting message from %s to %d clients in room %s", client_id, len(ws_list) - 1, room_id)
+        logger.debug("Message content: %.50s", message_body)
     
-    await asyncio.gather(
-        *[clients[cid].send(message_data) for cid in room_clients if cid in clients],
-        return_exceptions=True
-    )
+    conns = []
+    for cid, ws in ws_list:
+        if cid == client_id:
+            continue
+        # broadcast() has no backpressure, so drop clients that stopped reading
+        # rather than letting their unsent messages grow without bound
+        if ws.transport.get_write_buffer_size() > MAX_WRITE_BUFFER_SIZE:
+            _disconnect_slow_client(cid, ws)
+            continue
+        conns.append(ws)
     
-    logger.debug(f"Message broadcast completed for client {client_id}")
+    # broadcast() is synchronous: it writes the payload to each connection without
+    # awaiting, skipping connections that are closed. It still builds (and, with
+    # permessage-deflate, compresses) a frame per connection.
+    broadcast(conns, payload, text=True)
+    
+    if debug:
+        logger.debug("Message broadcast completed for client %s", client_id)
     return {"status": "success", "message": "Message sent"}
 
+# Handlers for each client action, called with (client_id, body). A handler returns
+# the response directly or a coroutine that resolves to it.
+_HANDLERS = {
+    "create": lambda client_id, body: create_room(client_id, body),
+    "join": lambda client_id, body: join_room(client_id, body.get("room_id") if body else None),
+    "leave": lambda client_id, body: leave_room(client_id),
+    "message": lambda client_id, body: broadcast_to_room(client_id, body),
+}
+
 async def action_handlers(client_id, message):
     """Define action handlers for different message types."""
     
-    logger.debug(f"Received message from client {client_id}: {message[:100]}{'...' if len(message) > 100 else ''}")
+    logger.debug("Received message from client %s: %.100s", client_id, message)
     
     # Parse for JSON message
     try:
-        data = json.loads(message)
+        data = orjson.loads(message)
         action = data.get("action")
         body = data.get("body")
 
-        logger.debug(f"Parsed action: {action}, body type: {type(body).__name__}")
+        logger.debug("Parsed action: %s, body type: %s", action, type(body).__name__)
 
-        if action not in ["create", "join", "leave", "message"]:
-            logger.debug(f"Invalid action '{action}' from client {client_id}")
+        handler = _HANDLERS.get(action)
+        if handler is None:
+            logger.debug("Invalid action '%s' from client %s", action, client_id)
             return {"status": "error", "message": "Invalid action"}
         
-        if action == "create":
-            return create_room(client_id, body)
-        elif action == "join":
-            return join_room(client_id, body.get("room_id") if body else None)
-        elif action == "leave":
-            return leave_room(client_id)
-        elif action == "message":
-            return await broadcast_to_room(client_id, body)
-    except json.JSONDecodeError as e:
+        response = handler(client_id, body)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON decode error from client {client_id}: {e}")
         return {"status": "error", "message": "Invalid JSON format"}
     except Exception as e:
         logger.error(f"Server error handling message from {client_id}: {e}")
         return {"status": "error", "message": f"Server error: {str(e)}"}
 
+def _cleanup(client_id):
+    """Remove a disconnected client from its room and from the connected clients."""
+    if client_id in client_rooms:
+        leave_room(client_id)
+    if client_id in clients:
+        del clients[client_id]
+    disconnecting_clients.discard(client_id)
+    logger.info(f"Client {client_id} disconnected. Total clients: {len(clients)}")
+
 async def handle_connection(websocket):
+    if len(clients) >= MAX_CLIENTS:
+        logger.info(f"Rejected connection, limit of {MAX_CLIENTS} clients reached")
+        await websocket.close(1013, "Server is full")
+        return
+
     # Generate a unique client ID for this connection
-    client_id = str(uuid.uuid4())[:8]
+    client_id = secrets.token_hex(4)
     clients[client_id] = websocket
     logger.info(f"New client connected: {client_id}. Total clients: {len(clients)}")
-    logger.debug(f"Client {client_id} websocket info: {websocket.remote_address}")
+    logger.debug("Client %s websocket info: %s", client_id, websocket.remote_address)
     
-    # Send welcome message with client ID
-    await websocket.send(json.dumps({
-        "status": "connected",
-        "client_id": client_id,
-        "message": "Welcome!"
-    }))
-    logger.debug(f"Sent welcome message to client {client_id}")
-
     try:
+        # Send welcome message with client ID
+        await websocket.send(orjson.dumps({
+            "status": "connected",
+            "client_id": client_id,
+            "message": "Welcome!"
+        }), text=True)
+        logger.debug("Sent welcome message to client %s", client_id)
+
         async for message in websocket:
             # Handle the message and get response
             response = await action_handlers(client_id, message)
             
             # Send response back to the client
             if response:
-                await websocket.send(json.dumps(response))
-                logger.debug(f"Sent response to client {client_id}: {response.get('status')}")
+                await websocket.send(orjson.dumps(response), text=True)
+                logger.debug("Sent response to client %s: %s", client_id, response.get("status"))
                 
+    except asyncio.CancelledError:
+        logger.info(f"Connection handler for {client_id} cancelled")
+        raise
     except Exception as e:
         logger.error(f"Error handling connection for {client_id}: {e}")
-        logger.debug(f"Exception details: {type(e).__name__}: {e}")
+        logger.debug("Exception details: %s: %s", type(e).__name__, e)
     finally:
-        # Clean up when client disconnects
-        if client_id in client_rooms:
-            leave_room(client_id)
-        if client_id in clients:
-            del clients[client_id]
-        logger.info(f"Client {client_id} disconnected. Total clients: {len(clients)}")
+        # Clean up when client disconnects. The cleanup is synchronous on purpose:
+        # with no await point, a cancellation cannot interrupt it half way.
+        _cleanup(client_id)
         
 async def main():
     logger.info("Starting chat server on localhost:8765")
-    async with serve(handle_connection, "localhost", 8765, max_queue=None) as server:
+    async with serve(handle_connection, "localhost", 8765, max_queue=MAX_INCOMING_QUEUE) as server:
         logger.info("Server started successfully")
         await server.serve_forever()
     
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -13,12 +13,16 @@ Test Phases:
 """
 
 import asyncio
-import json
 import time
 import sys
+import numpy as np
 import pandas as pd
-from dataclasses import dataclass, field
-from typing import List
+
+try:
+    import uvloop
+except ImportError:
+    # uvloop is optional (and unavailable on Windows), fall back to asyncio's loop
+    uvloop = None
 
 # Add parent directory to path to import client module
 sys.path.insert(0, '..')
@@ -40,22 +44,20 @@ TEST_DURATION_SECONDS = 60
 # Data Collection
 # =============================================================================
 
-@dataclass
-class LatencyRecord:
-    """Single latency measurement."""
-    msg_id: str
-    sender_id: str
-    receiver_id: str
-    send_time: float
-    receive_time: float
-    
-    @property
-    def latency_ms(self) -> float:
-        return (self.receive_time - self.send_time) * 1000
-
+# Latency measurements are stored column-wise in preallocated arrays. Each
+# listener owns a contiguous block of MAX_RECORDS_PER_CLIENT rows, starting at
+# client_index * MAX_RECORDS_PER_CLIENT, and tracks how many rows it filled in
+# record_counts[client_index].
+MAX_RECORDS_PER_CLIENT = TEST_DURATION_SECONDS * MESSAGES_PER_SECOND
+TOTAL_RECORDS = NUM_CLIENTS * MAX_RECORDS_PER_CLIENT
 
-# Shared list to collect all latency records (thread-safe with asyncio)
-latency_records: List[LatencyRecord] = []
+msg_ids = np.empty(TOTAL_RECORDS, dtype=np.int64)
+# Client IDs are kept as objects, a fixed-width string dtype would truncate longer IDs
+sender_ids = np.empty(TOTAL_RECORDS, dtype=object)
+receiver_ids = np.empty(TOTAL_RECORDS, dtype=object)
+send_times = np.empty(TOTAL_RECORDS, dtype=np.float64)
+receive_times = np.empty_like(send_times)
+record_counts = np.zeros(NUM_CLIENTS, dtype=np.int64)
 
 
 # =============================================================================
@@ -98,37 +100,36 @@ async def setup_room(num_clients: int) -> tuple[str, list[ChatClient]]:
 # =============================================================================
 # Latency Analysis Tasks
 # =============================================================================
-def determine_dropped_messages(received_records: List[LatencyRecord]) -> bool:
+def determine_dropped_messages(receivers: np.ndarray, received_msg_ids: np.ndarray) -> bool:
     """
     Determine if any messages were dropped based on received latency records.
     
     Args:
-        received_records: List of LatencyRecord instances received.
+        receivers: Receiver ID of each received record.
+        received_msg_ids: Integer message ID of each received record.
     Returns:
         True if any messages were dropped, False otherwise.
     """
-    # Group by receiver
-    records_by_receiver = {}
-    for record in received_records:
-        records_by_receiver.setdefault(record.receiver_id, []).append(record)
+    expected_msg_ids = np.arange(TEST_DURATION_SECONDS * MESSAGES_PER_SECOND)
     
     # Check for missing messages per receiver
     dropped = False
-    message_id_commonly_dropped = set()
-    for receiver_id, records in records_by_receiver.items():
-        sent_msg_ids = set(r.msg_id for r in records)
-        expected_msg_ids = set(f"test-{i}" for i in range(TEST_DURATION_SECONDS * MESSAGES_PER_SECOND))
-        
-        missing_msg_ids = expected_msg_ids - sent_msg_ids
-        if missing_msg_ids:
+    message_id_commonly_dropped = None
+    for receiver_id in np.unique(receivers):
+        missing_msg_ids = np.setdiff1d(expected_msg_ids, received_msg_ids[receivers == receiver_id])
+        if missing_msg_ids.size:
             if not dropped:
                 print(f"\n*** Determining Dropped Messages ***")
 
-            print(f"[Analysis] Receiver {receiver_id} missing {len(missing_msg_ids)} messages")
+            print(f"[Analysis] Receiver {receiver_id} missing {missing_msg_ids.size} messages")
             dropped = True
-            message_id_commonly_dropped.update(missing_msg_ids)
+        # Messages dropped for every receiver
+        if message_id_commonly_dropped is None:
+            message_id_commonly_dropped = missing_msg_ids
+        else:
+            message_id_commonly_dropped = np.intersect1d(message_id_commonly_dropped, missing_msg_ids, assume_unique=True)
     if dropped:
-        print(f"[Analysis] Commonly dropped message IDs: {sorted(message_id_commonly_dropped)}")
+        print(f"[Analysis] Commonly dropped message IDs: {message_id_commonly_dropped.tolist()}")
     return dropped
 
 # =============================================================================
@@ -145,46 +146,50 @@ async def listener_task(client: ChatClient, client_index: int, stop_event: async
         stop_event: Event to signal when to stop listening
     """
     receiver_id = client.client_id
+    _now = time.time  # Avoid the attribute lookup per received message
+    block_start = client_index * MAX_RECORDS_PER_CLIENT
+    block_end = block_start + MAX_RECORDS_PER_CLIENT
+    row = block_start
     
     try:
-        async for message in client.read_messages():
+        async for msg in client.read_messages():
             # Check if we should stop
             if stop_event.is_set():
                 break
             
-            # Parse the message
-            try:
-                msg = json.loads(message)
-                body = msg.get("body")
+            # Test messages carry their embedded timestamp in a JSON object body
+            body = msg.get("body")
+            if isinstance(body, dict) and "send_time" in body:
+                receive_time = _now()
+                send_time = body["send_time"]
+                msg_id = body.get("msg_id")
                 
-                # Check if this is a test message with embedded timestamp
-                if isinstance(body, str):
-                    try:
-                        body = json.loads(body)
-                    except json.JSONDecodeError:
-                        continue  # Not a JSON body, skip
+                # msg_ids is an int64 array, a record without an integer ID cannot be stored
+                if not isinstance(msg_id, int) or isinstance(msg_id, bool):
+                    print(f"[Client {client_index}] Ignoring msg with non-integer ID {msg_id!r}")
+                    continue
                 
-                if body and "send_time" in body:
-                    receive_time = time.time()
-                    
-                    # Create latency record
-                    record = LatencyRecord(
-                        msg_id=body.get("msg_id", "unknown"),
-                        sender_id=body.get("sender_id", msg.get("from", "unknown")),
-                        receiver_id=receiver_id,
-                        send_time=body["send_time"],
-                        receive_time=receive_time
-                    )
-                    
-                    latency_records.append(record)
-                    print(f"[Client {client_index}] Received msg {record.msg_id} | Latency: {record.latency_ms:.2f}ms")
-                    
-            except json.JSONDecodeError:
-                continue  # Skip non-JSON messages
+                # Never write past this listener's block, it belongs to the next listener
+                if row == block_end:
+                    print(f"[Client {client_index}] Record block full, ignoring msg {msg_id}")
+                    continue
+                
+                # Write the latency record into this listener's block
+                msg_ids[row] = msg_id
+                sender_ids[row] = body.get("sender_id", msg.get("from", "unknown"))
+                receiver_ids[row] = receiver_id
+                send_times[row] = send_time
+                receive_times[row] = receive_time
+                row += 1
+                
+                print(f"[Client {client_index}] Received msg {msg_id} | Latency: {(receive_time - send_time) * 1000:.2f}ms")
                 
     except Exception as e:
         if not stop_event.is_set():
             print(f"[Client {client_index}] Listener error: {e}")
+    finally:
+        # Also runs when the listener is cancelled at the end of the test
+        record_counts[client_index] = row - block_start
 
 
 # =============================================================================
@@ -233,12 +238,12 @@ async def main():
     num_messages = TEST_DURATION_SECONDS * MESSAGES_PER_SECOND
     print(f"\n[Test] Sending test messages from client 0...")
     for msg_num in range(num_messages):
-        test_message = json.dumps({
-            "msg_id": f"test-{msg_num}",
+        test_message = {
+            "msg_id": msg_num,
             "sender_id": clients[0].client_id,
             "send_time": time.time(),
             "payload": f"Test message {msg_num}"
-        })
+        }
         await clients[0].send_message(test_message)
         await asyncio.sleep(delay_time)
     
@@ -260,20 +265,29 @@ async def main():
     print(f"  Results")
     print(f"{'='*50}\n")
     
+    # Keep only the filled rows of each listener's block
+    filled = (np.arange(MAX_RECORDS_PER_CLIENT) < record_counts[:, None]).ravel()
+    latencies = (receive_times[filled] - send_times[filled]) * 1000
+
     # export results to CSV
-    data_frame = pd.DataFrame([r.__dict__ for r in latency_records])
+    data_frame = pd.DataFrame({
+        "msg_id": msg_ids[filled],
+        "sender_id": sender_ids[filled],
+        "receiver_id": receiver_ids[filled],
+        "send_time": send_times[filled],
+        "receive_time": receive_times[filled],
+    })
     print(data_frame.head())
     data_frame.to_csv("data/latency_results.csv", index=False)
 
     # Determine dropped messages
-    dropped = determine_dropped_messages(latency_records)
+    dropped = determine_dropped_messages(receiver_ids[filled], msg_ids[filled])
 
-    if latency_records:
-        latencies = [r.latency_ms for r in latency_records]
-        print(f"Total messages received: {len(latency_records)}")
-        print(f"Min latency: {min(latencies):.2f}ms")
-        print(f"Max latency: {max(latencies):.2f}ms")
-        print(f"Avg latency: {sum(latencies)/len(latencies):.2f}ms")
+    if latencies.size:
+        print(f"Total messages received: {latencies.size}")
+        print(f"Min latency: {latencies.min():.2f}ms")
+        print(f"Max latency: {latencies.max():.2f}ms")
+        print(f"Avg latency: {latencies.mean():.2f}ms")
         print(f"Dropped messages detected: {'Yes' if dropped else 'No'}")
     else:
         print("No latency records collected.")
@@ -286,4 +300,7 @@ async def main():
     print(f"[Cleanup] Done!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -0,0 +1,57 @@
+"""
+Room Cleanup Check
+
+This check verifies that the server does not leak rooms. It runs the chat
+server in-process (so its room state can be inspected), has a single client
+create several rooms back to back, disconnects it and checks that no rooms
+are left behind.
+
+Run it while no other server is listening on localhost:8765.
+"""
+
+import asyncio
+import sys
+
+# Add parent directory to path to import server and client modules
+sys.path.insert(0, '..')
+import server
+from client import ChatClient
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+SERVER_URI = "ws://localhost:8765"
+NUM_ROOMS = 5
+
+
+# =============================================================================
+# Main Entry Point
+# =============================================================================
+
+async def main():
+    """Main entry point for the room cleanup check."""
+    server_task = asyncio.create_task(server.main())
+    await asyncio.sleep(0.5)  # Give the server time to start listening
+
+    client = ChatClient(SERVER_URI, log_level='NONE')
+    await client.connect()
+    for i in range(NUM_ROOMS):
+        await client.create_room(f"cleanup-room-{i}")
+    print(f"[Check] Client created {NUM_ROOMS} rooms, server holds {len(server.rooms)}")
+
+    await client.websocket.close()
+    await asyncio.sleep(0.5)  # Give the server time to clean up
+
+    server_task.cancel()
+    await asyncio.gather(server_task, return_exceptions=True)
+
+    print(f"[Check] Rooms left after disconnect: {len(server.rooms)}")
+    assert not server.rooms, f"Rooms leaked: {list(server.rooms)}"
+    assert not server.client_rooms, f"Client rooms leaked: {server.client_rooms}"
+    assert not server.clients, f"Clients leaked: {list(server.clients)}"
+    print("[Check] OK")
+
+if __name__ == "__main__":
+    asyncio.run(main())